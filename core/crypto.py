@@ -20,32 +20,80 @@ Security notes:
 """
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from argon2.low_level import hash_secret_raw, Type
+import functools
+import hashlib
 import secrets
 import os
 import ctypes
+import numpy as np
 from typing import Tuple
 
+try:
+    from nacl import pwhash as _nacl_pwhash
+    _NACL_AVAILABLE = True
+except ImportError:
+    _NACL_AVAILABLE = False
+
+try:
+    from Crypto.Cipher import AES as _pycryptodome_aes  # noqa: F401
+    _PYCRYPTODOME_AVAILABLE = True
+except ImportError:
+    _PYCRYPTODOME_AVAILABLE = False
+
+try:
+    import numba as _numba
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
 # Argon2id recommended parameters (tunable)
 ARGON2_TIME_COST = 4          # iterations
 ARGON2_MEMORY_COST = 1 << 18  # 256 MB (adjust according to target machines)
 ARGON2_PARALLELISM = 4
 ARGON2_HASH_LEN = 32          # bytes
 
+# Parameter profiles: "interactive" keeps GUI password prompts responsive,
+# "sensitive" is the hardened default for at-rest material.
+ARGON2_PROFILES = {
+    "interactive": {"time_cost": 2, "memory_cost": 1 << 16, "parallelism": ARGON2_PARALLELISM},
+    "sensitive": {"time_cost": ARGON2_TIME_COST, "memory_cost": ARGON2_MEMORY_COST,
+                  "parallelism": ARGON2_PARALLELISM},
+}
+
 
 def derive_key(password: bytes, salt: bytes = None,
                time_cost=ARGON2_TIME_COST,
                memory_cost=ARGON2_MEMORY_COST,
                parallelism=ARGON2_PARALLELISM,
-               hash_len=ARGON2_HASH_LEN) -> Tuple[bytes, bytes]:
+               hash_len=ARGON2_HASH_LEN,
+               profile: str = None) -> Tuple[bytes, bytes]:
     """
     Derive a symmetric key from a password using Argon2id.
     Returns (key, salt). If salt is None a new random 16-byte salt is returned.
+    `profile` selects a named parameter set from ARGON2_PROFILES, overriding
+    the individual cost arguments; callers must persist the chosen params
+    (e.g. in the stego header) to re-derive the same key later.
     """
+    if profile is not None:
+        params = ARGON2_PROFILES[profile]
+        time_cost = params["time_cost"]
+        memory_cost = params["memory_cost"]
+        parallelism = params["parallelism"]
     if salt is None:
         salt = secrets.token_bytes(16)
+    # libsodium's SIMD-optimized Argon2id core is considerably faster than the
+    # reference implementation; it only supports lanes=1, so use it when the
+    # requested parallelism allows (output is identical for equal params).
+    if _NACL_AVAILABLE and parallelism == 1 and len(salt) == 16:
+        key = _nacl_pwhash.argon2id.kdf(
+            hash_len, password, salt,
+            opslimit=time_cost, memlimit=memory_cost * 1024
+        )
+        return key, salt
     key = hash_secret_raw(
         secret=password,
         salt=salt,
@@ -58,6 +106,135 @@ def derive_key(password: bytes, salt: bytes = None,
     return key, salt
 
 
+@functools.lru_cache(maxsize=16)
+def derive_key_cached(password: bytes, salt: bytes,
+                      time_cost=ARGON2_TIME_COST,
+                      memory_cost=ARGON2_MEMORY_COST,
+                      parallelism=ARGON2_PARALLELISM,
+                      hash_len=ARGON2_HASH_LEN) -> bytes:
+    """
+    Session-scoped memoization of derive_key for repeated prompts with the
+    same password/salt (e.g. GUI header-read followed by payload-read).
+    Salt must be explicit so cache entries are well-defined.
+    """
+    key, _ = derive_key(password, salt=salt, time_cost=time_cost,
+                        memory_cost=memory_cost, parallelism=parallelism,
+                        hash_len=hash_len)
+    return key
+
+
+def _dedup_first_seen(idx, taken, out, filled):
+    """
+    Consume candidate indices in stream order, keeping first occurrences.
+    Tight bit-level loop; JIT-compiled when Numba is installed.
+    Returns the updated fill count.
+    """
+    count = out.shape[0]
+    for i in range(idx.shape[0]):
+        v = idx[i]
+        if not taken[v]:
+            taken[v] = True
+            out[filled] = v
+            filled += 1
+            if filled == count:
+                break
+    return filled
+
+
+if _NUMBA_AVAILABLE:
+    _dedup_first_seen = _numba.njit(cache=True)(_dedup_first_seen)
+
+
+def keyed_index_stream(key: bytes, count: int, total: int) -> np.ndarray:
+    """
+    Deterministic keyed stream of `count` unique indices in [0, total),
+    deduped in first-seen order. Index bytes come from a ChaCha20 keystream
+    (SIMD assembly in OpenSSL, multi-GB/s) under a SHA-256-derived 32-byte
+    key, generated in bulk rather than one hash call per index.
+    Used for stego position/frame selection; deterministic per key.
+    """
+    if count > total:
+        raise ValueError("Requested more unique indices than available")
+    key32 = hashlib.sha256(key).digest()
+    stream = Cipher(algorithms.ChaCha20(key32, b"\0" * 16), mode=None).encryptor()
+    out = np.empty(count, dtype=np.int64)
+    taken = np.zeros(total, dtype=bool)
+    filled = 0
+    nwords = max(count, 16)
+    while filled < count:
+        # encrypting zeros yields raw keystream; update() continues the
+        # stream, so top-up draws extend rather than restart it
+        raw = np.frombuffer(stream.update(b"\0" * (4 * nwords)), dtype='>u4')
+        idx = (raw % total).astype(np.int64)
+        if _NUMBA_AVAILABLE:
+            # linear first-seen scan in machine code (np.unique sorts)
+            filled = _dedup_first_seen(idx, taken, out, filled)
+        else:
+            cand = idx[~taken[idx]]
+            # first-occurrence dedup within the chunk, preserving stream order
+            _, first = np.unique(cand, return_index=True)
+            cand = cand[np.sort(first)]
+            taken[cand] = True
+            k = min(len(cand), count - filled)
+            out[filled:filled + k] = cand[:k]
+            filled += k
+        nwords *= 2
+    return out
+
+
+def _cpu_crypto_features() -> dict:
+    """
+    Best-effort probe for hardware crypto extensions: AES-NI, carry-less
+    multiply (PCLMULQDQ / ARM PMULL, used for GHASH) and SHA extensions.
+    Reads OS-reported CPU feature flags; each value is True/False, or None
+    when the platform exposes nothing (e.g. macOS, non-/proc systems).
+    """
+    feats = {"aes": None, "clmul": None, "sha": None}
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith(('flags', 'Features')):
+                    flags = set(line.split(':', 1)[1].split())
+                    feats['aes'] = 'aes' in flags
+                    feats['clmul'] = 'pclmulqdq' in flags or 'pmull' in flags
+                    feats['sha'] = 'sha_ni' in flags or 'sha2' in flags
+                    break
+    except OSError:
+        pass
+    return feats
+
+
+CPU_FEATURES = _cpu_crypto_features()
+
+
+def backend_info() -> dict:
+    """
+    Report which crypto backends are in play and whether the hot paths are
+    likely hardware-accelerated, so callers (e.g. the GUI) can warn when
+    AES runs in software.
+    """
+    import cryptography
+    import ssl
+    return {
+        "cpu": dict(CPU_FEATURES),
+        "cryptography_version": cryptography.__version__,
+        "openssl": ssl.OPENSSL_VERSION,
+        "libsodium_kdf": _NACL_AVAILABLE,
+        "pycryptodome_available": _PYCRYPTODOME_AVAILABLE,
+        "hardware_aes_likely": CPU_FEATURES.get("aes") is not False,
+    }
+
+
+@functools.lru_cache(maxsize=32)
+def _aesgcm_for_key(key: bytes) -> AESGCM:
+    """
+    Cache AESGCM instances per key so the OpenSSL key schedule / EVP context
+    setup is paid once, not on every encrypt/decrypt call (the init cost
+    dominates AES-NI throughput for small payloads such as log lines).
+    """
+    return AESGCM(key)
+
+
 def aes_gcm_encrypt(key: bytes, plaintext: bytes, associated_data: bytes = b'') -> Tuple[bytes, bytes]:
     """
     AES-256-GCM encryption.
@@ -65,17 +242,42 @@ def aes_gcm_encrypt(key: bytes, plaintext: bytes, associated_data: bytes = b'')
     """
     if len(key) != 32:
         raise ValueError("AES-GCM key must be 32 bytes (AES-256).")
-    aesgcm = AESGCM(key)
+    aesgcm = _aesgcm_for_key(key)
     nonce = secrets.token_bytes(12)  # 96-bit recommended
     ct = aesgcm.encrypt(nonce, plaintext, associated_data)
     return nonce, ct
 
 
 def aes_gcm_decrypt(key: bytes, nonce: bytes, ciphertext: bytes, associated_data: bytes = b'') -> bytes:
-    aesgcm = AESGCM(key)
+    aesgcm = _aesgcm_for_key(key)
     return aesgcm.decrypt(nonce, ciphertext, associated_data)
 
 
+AES_GCM_STREAM_CHUNK = 1 << 20  # 1 MiB
+
+
+def aes_gcm_encrypt_stream(key: bytes, source, associated_data: bytes = b'') -> Tuple[bytes, bytes]:
+    """
+    AES-256-GCM over a buffer-like source (mmap, memoryview, bytes) in 1 MiB
+    chunks, so a large payload never needs a second full in-memory copy of
+    the plaintext. Output is wire-compatible with aes_gcm_encrypt /
+    aes_gcm_decrypt (ciphertext with the 16-byte tag appended).
+    """
+    if len(key) != 32:
+        raise ValueError("AES-GCM key must be 32 bytes (AES-256).")
+    nonce = secrets.token_bytes(12)
+    enc = Cipher(algorithms.AES(key), modes.GCM(nonce)).encryptor()
+    if associated_data:
+        enc.authenticate_additional_data(associated_data)
+    view = memoryview(source)
+    out = bytearray()
+    for off in range(0, len(view), AES_GCM_STREAM_CHUNK):
+        out += enc.update(view[off:off + AES_GCM_STREAM_CHUNK])
+    out += enc.finalize()
+    out += enc.tag
+    return nonce, bytes(out)
+
+
 def generate_rsa_keypair(bits: int = 4096) -> Tuple[bytes, bytes]:
     """
     Generate RSA keypair for optional key exchange.
@@ -123,13 +325,39 @@ def rsa_unwrap_key(priv_pem: bytes, wrapped_key: bytes) -> bytes:
     return key
 
 
+def _load_wipe_fn():
+    """
+    Locate a non-elidable zeroing primitive: explicit_bzero on POSIX libc,
+    RtlSecureZeroMemory on Windows. Returns None if neither is available,
+    in which case plain ctypes.memset is used.
+    """
+    if os.name == 'nt':
+        try:
+            return ctypes.windll.kernel32.RtlSecureZeroMemory
+        except (AttributeError, OSError):
+            return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.explicit_bzero
+    except (AttributeError, OSError):
+        return None
+
+
+_WIPE_FN = _load_wipe_fn()
+
+
 def secure_wipe(b: bytearray):
     """
     Attempt to zero memory of a mutable bytearray. Best-effort.
+    Uses explicit_bzero / RtlSecureZeroMemory where available so the wipe
+    cannot be optimized away; falls back to ctypes.memset.
     """
     if not isinstance(b, (bytearray, memoryview)):
         raise TypeError("secure_wipe expects a bytearray or memoryview")
-    for i in range(len(b)):
-        b[i] = 0
-    # Attempt to prevent optimization away
-    ctypes.memset(ctypes.addressof(ctypes.c_char.from_buffer(b)), 0, len(b))
+    if len(b) == 0:
+        return
+    buf = (ctypes.c_char * len(b)).from_buffer(b)
+    if _WIPE_FN is not None:
+        _WIPE_FN(buf, len(b))
+    else:
+        ctypes.memset(buf, 0, len(b))
@@ -14,31 +14,49 @@ Design:
  - The header itself is encrypted with a key derived from password,
    or with an RSA-wrapped symmetric key. This keeps metadata confidential.
 
-Header is small and appended/prepended in a canonical binary format.
+Header is small and prepended in a canonical fixed-layout binary format:
+MAGIC | version | time_cost | log2(memory_cost) | parallelism | salt |
+nonce | wrapped_key length | payload length, followed by the wrapped key
+bytes (if any). The fixed layout is about a third the size of the old
+hex-in-JSON encoding — every header byte costs 8 carrier bits to embed —
+and parsing is a single struct.unpack.
 """
 
 import struct
-import json
 from typing import Optional
 
 MAGIC = b'NEST'  # 4 bytes
 VERSION = 1
 
+SALT_LEN = 16
+NONCE_LEN = 12
+
+# magic | version | argon2 time | argon2 log2(mem) | argon2 lanes |
+# salt | nonce | wrapped_key len | payload len
+_HEADER_FMT = '>4sBBBB16s12sHI'
+HEADER_LEN = struct.calcsize(_HEADER_FMT)
+
+
 def build_header(salt: bytes, argon2_params: dict, nonce: bytes, wrapped_key: Optional[bytes], payload_len: int) -> bytes:
     """
-    Build a JSON-like header, then encode: MAGIC|version|len(header)|header-json-bytes
-    Header json contains base64-ish encoded fields (we'll use hex to avoid dependencies).
+    Pack header fields into the fixed binary layout.
+    argon2_params may carry 'time', 'memory' (in KiB, must be a power of two)
+    and 'parallelism'; missing entries fall back to the suite defaults.
     """
-    header_obj = {
-        "argon2": argon2_params,
-        "salt": salt.hex(),
-        "nonce": nonce.hex(),
-        "wrapped_key": wrapped_key.hex() if wrapped_key else None,
-        "payload_len": payload_len
-    }
-    header_json = json.dumps(header_obj, separators=(',', ':'), sort_keys=True).encode('utf-8')
-    header_len = len(header_json)
-    return MAGIC + struct.pack(">B", VERSION) + struct.pack(">I", header_len) + header_json
+    if len(salt) != SALT_LEN:
+        raise ValueError(f"Salt must be {SALT_LEN} bytes")
+    if len(nonce) != NONCE_LEN:
+        raise ValueError(f"Nonce must be {NONCE_LEN} bytes")
+    time_cost = int(argon2_params.get('time', 4))
+    memory_cost = int(argon2_params.get('memory', 1 << 18))
+    parallelism = int(argon2_params.get('parallelism', 4))
+    mem_log2 = memory_cost.bit_length() - 1
+    if 1 << mem_log2 != memory_cost:
+        raise ValueError("Argon2 memory_cost must be a power of two for header encoding")
+    wrapped = wrapped_key or b''
+    fixed = struct.pack(_HEADER_FMT, MAGIC, VERSION, time_cost, mem_log2,
+                        parallelism, salt, nonce, len(wrapped), payload_len)
+    return fixed + wrapped
 
 
 def parse_header(data: bytes):
@@ -47,19 +65,20 @@ def parse_header(data: bytes):
     Returns (header_obj_dict, header_total_length).
     Raises ValueError on invalid/missing header.
     """
-    if len(data) < 9:
+    if len(data) < HEADER_LEN:
         raise ValueError("Data too short for header")
     if data[:4] != MAGIC:
         raise ValueError("Invalid magic")
-    version = data[4]
-    header_len = struct.unpack(">I", data[5:9])[0]
-    if len(data) < 9 + header_len:
+    (magic, version, time_cost, mem_log2, parallelism,
+     salt, nonce, wrapped_len, payload_len) = struct.unpack_from(_HEADER_FMT, data)
+    if len(data) < HEADER_LEN + wrapped_len:
         raise ValueError("Incomplete header")
-    header_json = data[9:9+header_len]
-    import json
-    obj = json.loads(header_json.decode('utf-8'))
-    # Normalize
-    obj['salt'] = bytes.fromhex(obj['salt'])
-    obj['nonce'] = bytes.fromhex(obj['nonce'])
-    obj['wrapped_key'] = bytes.fromhex(obj['wrapped_key']) if obj.get('wrapped_key') else None
-    return obj, 9 + header_len
+    wrapped = data[HEADER_LEN:HEADER_LEN + wrapped_len]
+    obj = {
+        "argon2": {"time": time_cost, "memory": 1 << mem_log2, "parallelism": parallelism},
+        "salt": salt,
+        "nonce": nonce,
+        "wrapped_key": wrapped if wrapped else None,
+        "payload_len": payload_len
+    }
+    return obj, HEADER_LEN + wrapped_len
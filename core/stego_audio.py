@@ -9,11 +9,23 @@ Features:
 
 import wave
 import numpy as np
-from hashlib import sha256
 import secrets
 import core.crypto as crypto
 
+try:
+    import soundfile as sf
+    _SF_AVAILABLE = True
+except Exception:
+    _SF_AVAILABLE = False
+
+# int16 scalar mask keeps the LSB clear in the int16 SIMD kernel
+_LSB_CLEAR = np.int16(~1)
+
+
 def calculate_wav_capacity(wav_path: str, lsb_count: int = 1) -> int:
+    if _SF_AVAILABLE:
+        info = sf.info(wav_path)
+        return info.frames * info.channels * lsb_count
     with wave.open(wav_path, 'rb') as wf:
         nframes = wf.getnframes()
         nchannels = wf.getnchannels()
@@ -21,55 +33,54 @@ def calculate_wav_capacity(wav_path: str, lsb_count: int = 1) -> int:
         # capacity in bits
         return nframes * nchannels * lsb_count
 
-def _prng_positions_audio(n_samples: int, payload_bits: int, key: bytes):
-    positions = []
-    counter = 0
-    while len(positions) < payload_bits:
-        data = key + counter.to_bytes(8, 'big')
-        digest = sha256(data).digest()
-        for j in range(0, len(digest), 4):
-            if len(positions) >= payload_bits:
-                break
-            idx = int.from_bytes(digest[j:j+4], 'big') % n_samples
-            if idx not in positions:
-                positions.append(idx)
-        counter += 1
-    return positions
 
-def embed_wav_lsb(input_wav: str, payload: bytes, stego_key: bytes, output_wav: str, lsb_count: int = 1):
-    with wave.open(input_wav, 'rb') as r:
+def _read_samples(wav_path: str):
+    """
+    Read 16-bit PCM samples as a flat writable int16 array plus whatever
+    writer state is needed to re-save. soundfile hands back a writable
+    ndarray directly (no frombuffer copy + .copy() doubling); the wave
+    fallback keeps the old copy-based path.
+    """
+    if _SF_AVAILABLE:
+        samples, sr = sf.read(wav_path, dtype='int16', always_2d=True)
+        return samples.reshape(-1), ('sf', sr, samples.shape[1])
+    with wave.open(wav_path, 'rb') as r:
         params = r.getparams()
         frames = r.readframes(params.nframes)
-        samples = np.frombuffer(frames, dtype=np.int16)  # assumes 16-bit PCM; production must handle formats
+    return np.frombuffer(frames, dtype=np.int16).copy(), ('wave', params)
+
+
+def _write_samples(wav_path: str, samples: np.ndarray, meta):
+    if meta[0] == 'sf':
+        _, sr, nchannels = meta
+        sf.write(wav_path, samples.reshape(-1, nchannels), sr, subtype='PCM_16')
+        return
+    with wave.open(wav_path, 'wb') as w:
+        w.setparams(meta[1])
+        w.writeframes(samples.tobytes())
+
+def _prng_positions_audio(n_samples: int, payload_bits: int, key: bytes):
+    return crypto.keyed_index_stream(key, payload_bits, n_samples).tolist()
+
+def embed_wav_lsb(input_wav: str, payload: bytes, stego_key: bytes, output_wav: str, lsb_count: int = 1):
+    samples, meta = _read_samples(input_wav)  # assumes 16-bit PCM; production must handle formats
     payload_bits = len(payload) * 8
     capacity = len(samples) * lsb_count
     if payload_bits > capacity:
         raise ValueError("Payload too large for WAV capacity")
     positions = _prng_positions_audio(len(samples), payload_bits, stego_key)
-    bitstream = []
-    for byte in payload:
-        for i in range(8)[::-1]:
-            bitstream.append((byte >> i) & 1)
-    samples_mod = samples.copy()
-    for pos, bit in zip(positions, bitstream):
-        samples_mod[pos] = (samples_mod[pos] & ~1) | bit
-    with wave.open(output_wav, 'wb') as w:
-        w.setparams(params)
-        w.writeframes(samples_mod.tobytes())
+    bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8)).astype(np.int16)
+    # Vectorized fancy-indexed in-place write: the read path already hands
+    # back a private writable array, so no extra copy is needed
+    pos = np.asarray(positions, dtype=np.int64)
+    samples[pos] = (samples[pos] & _LSB_CLEAR) | bits
+    _write_samples(output_wav, samples, meta)
     return {"output": output_wav, "payload_bits": payload_bits, "capacity_bits": capacity}
 
 def extract_wav_lsb(stego_wav: str, stego_key: bytes, payload_len_bytes: int) -> bytes:
-    with wave.open(stego_wav, 'rb') as r:
-        params = r.getparams()
-        frames = r.readframes(params.nframes)
-        samples = np.frombuffer(frames, dtype=np.int16)
+    samples, _ = _read_samples(stego_wav)
     payload_bits = payload_len_bytes * 8
     positions = _prng_positions_audio(len(samples), payload_bits, stego_key)
-    bits = [samples[pos] & 1 for pos in positions]
-    out = bytearray()
-    for i in range(0, len(bits), 8):
-        byte = 0
-        for b in bits[i:i+8]:
-            byte = (byte << 1) | b
-        out.append(byte)
-    return bytes(out)
+    pos = np.asarray(positions, dtype=np.int64)
+    bits = (samples[pos] & 1).astype(np.uint8)
+    return np.packbits(bits).tobytes()
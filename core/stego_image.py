@@ -20,10 +20,7 @@ Note:
 
 from PIL import Image
 import numpy as np
-import secrets
-import math
 from typing import Tuple, List
-from hashlib import sha256
 import core.header as header_mod
 import core.crypto as crypto
 
@@ -33,6 +30,11 @@ try:
 except Exception:
     _CV2_AVAILABLE = False
 
+# uint8 scalars keep the masked writes in NumPy's uint8 SIMD kernels
+# (a bare Python ~1 == -2 would upcast the whole operation)
+_LSB_CLEAR = np.uint8(0xFE)
+_LSB_MASK = np.uint8(1)
+
 
 def _prng_positions(width: int, height: int, payload_bits: int, key: bytes) -> List[int]:
     """
@@ -42,21 +44,7 @@ def _prng_positions(width: int, height: int, payload_bits: int, key: bytes) -> L
     total = width * height * 3  # assume RGB channels
     if payload_bits > total:
         raise ValueError("Payload too large for image capacity in naive mode")
-    positions = []
-    counter = 0
-    i = 0
-    while len(positions) < payload_bits:
-        data = key + counter.to_bytes(8, 'big')
-        digest = sha256(data).digest()
-        # consume 8-byte chunks to generate indices
-        for j in range(0, len(digest), 4):
-            if len(positions) >= payload_bits:
-                break
-            idx = int.from_bytes(digest[j:j+4], 'big') % total
-            if idx not in positions:
-                positions.append(idx)
-        counter += 1
-    return positions
+    return crypto.keyed_index_stream(key, payload_bits, total).tolist()
 
 
 def _edge_mask(image_np: np.ndarray) -> np.ndarray:
@@ -65,12 +53,14 @@ def _edge_mask(image_np: np.ndarray) -> np.ndarray:
     Returns boolean mask with True where embedding is preferred.
     """
     if not _CV2_AVAILABLE:
-        # Fallback: use high local variance as proxy for edges
-        gray = np.mean(image_np, axis=2).astype(np.uint8)
-        kernel = np.ones((3,3), dtype=int)
+        # Fallback: use high local variance as proxy for edges.
+        # Stays in uint8/uint16 throughout — the old float64 promotion cost
+        # 8x the memory traffic of the integer pipeline.
+        gray = (image_np.sum(axis=2, dtype=np.uint16) // 3).astype(np.uint8)
         from scipy import ndimage
-        local_mean = ndimage.uniform_filter(gray.astype(float), size=3)
-        local_var = (gray - local_mean)**2
+        local_mean = ndimage.uniform_filter(gray, size=3)  # integer box filter
+        diff = np.abs(gray.astype(np.int16) - local_mean).astype(np.uint16)
+        local_var = diff * diff
         thresh = np.percentile(local_var, 60)
         return local_var > thresh
     # Use Canny edges
@@ -79,19 +69,56 @@ def _edge_mask(image_np: np.ndarray) -> np.ndarray:
     return edges > 0
 
 
+def _capacity_from_mask(mask: np.ndarray) -> int:
+    """Capacity estimate for a precomputed edge mask (bits)."""
+    edge_pixels = np.count_nonzero(mask)
+    non_edge_pixels = mask.size - edge_pixels
+    # integer arithmetic: 1 bit/channel on edges, 0.25 bits/channel elsewhere
+    return int(edge_pixels * 3 + (non_edge_pixels * 3) // 4)
+
+
 def calculate_capacity(image: Image.Image) -> int:
     """
     Estimate maximum payload bits for adaptive LSB with edge preference.
     Conservative: 1 bit per color channel per pixel on edge pixels,
     and 0.25 bits/channel on non-edge pixels.
     """
-    w, h = image.size
-    npimg = np.array(image.convert('RGB'))
-    mask = _edge_mask(npimg)
-    edge_pixels = np.count_nonzero(mask)
-    non_edge_pixels = w*h - edge_pixels
-    capacity_bits = edge_pixels * 3 * 1 + non_edge_pixels * 3 * 0.25
-    return int(math.floor(capacity_bits))
+    npimg = np.asarray(image.convert('RGB'))
+    return _capacity_from_mask(_edge_mask(npimg))
+
+
+def _embed_ndarray(npimg: np.ndarray, payload: bytes, stego_key: bytes,
+                   positions=None) -> np.ndarray:
+    """
+    Core LSB worker: embed payload into an RGB uint8 ndarray and return the
+    modified array. No file or PNG round-trip, so callers holding frames in
+    memory (e.g. the video module) can embed directly.
+
+    `positions` may be a precomputed keyed position array (at least
+    payload-bits long); the keyed stream is prefix-stable, so callers
+    embedding many same-sized frames can generate it once and reuse it.
+    """
+    h, w = npimg.shape[:2]
+    payload_bits = len(payload) * 8
+    if positions is None:
+        positions = _prng_positions(w, h, payload_bits, stego_key)
+    else:
+        positions = positions[:payload_bits]
+
+    # Convert payload to bit stream (MSB-first per byte, matching extraction)
+    bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
+
+    # Modify in place; only copy if the caller's array is read-only
+    if not npimg.flags.writeable:
+        npimg = npimg.copy()
+    # Adaptive: if pixel at pos is near smooth area, flip LSB less frequently:
+    # but since positions are PRNG-selected, embed directly.
+    # Index the 3-D array straight through unravelled coordinates: one
+    # fancy-indexed write, no flatten view or contiguity requirement.
+    pos = np.asarray(positions, dtype=np.int64)
+    rows, cols, chans = np.unravel_index(pos, npimg.shape)
+    npimg[rows, cols, chans] = (npimg[rows, cols, chans] & _LSB_CLEAR) | bits
+    return npimg
 
 
 def embed_lsb_adaptive(input_image_path: str, payload: bytes, stego_key: bytes, output_path: str) -> dict:
@@ -102,32 +129,19 @@ def embed_lsb_adaptive(input_image_path: str, payload: bytes, stego_key: bytes,
     For JPEG use separate DCT-based method below.
     """
     img = Image.open(input_image_path).convert('RGB')
-    w, h = img.size
-    npimg = np.array(img)
+    # asarray avoids an up-front copy; the embed worker copies only if the
+    # PIL-backed buffer is read-only
+    npimg = np.asarray(img, dtype=np.uint8)
     payload_bits = len(payload) * 8
-    capacity = calculate_capacity(img)
+    # Edge detection runs once; the mask feeds both the capacity estimate
+    # and the embedding preference (previously Canny ran twice per embed)
+    edge_mask = _edge_mask(npimg)
+    capacity = _capacity_from_mask(edge_mask)
     if payload_bits > capacity:
         raise ValueError(f"Payload too large ({payload_bits} bits) for image capacity {capacity} bits")
 
-    # Build embedding positions (prefer edge pixels first)
-    edge_mask = _edge_mask(npimg).flatten()
-    total_pixels = w * h * 3
-    positions = _prng_positions(w, h, payload_bits, stego_key)
-
-    # Convert payload to bit stream
-    bitstream = []
-    for byte in payload:
-        for i in range(8)[::-1]:
-            bitstream.append((byte >> i) & 1)
-
-    flat = npimg.flatten()
-    for pos_idx, bit in zip(positions, bitstream):
-        # Adaptive: if pixel at pos is near smooth area, flip LSB less frequently:
-        # but since positions are PRNG-selected, embed directly
-        flat[pos_idx] = (flat[pos_idx] & ~1) | bit
-
-    new_np = flat.reshape(npimg.shape)
-    out_img = Image.fromarray(new_np.astype('uint8'), 'RGB')
+    new_np = _embed_ndarray(npimg, payload, stego_key)
+    out_img = Image.fromarray(new_np, 'RGB')  # already uint8; no astype copy
     out_img.save(output_path, format='PNG', optimize=True)
     return {
         "output": output_path,
@@ -143,18 +157,13 @@ def extract_lsb_adaptive(stego_image_path: str, stego_key: bytes, payload_len_by
     """
     img = Image.open(stego_image_path).convert('RGB')
     w, h = img.size
-    npimg = np.array(img)
+    npimg = np.asarray(img, dtype=np.uint8)
     payload_bits = payload_len_bytes * 8
     positions = _prng_positions(w, h, payload_bits, stego_key)
-    flat = npimg.flatten()
-    bits = [flat[pos] & 1 for pos in positions]
-    out = bytearray()
-    for i in range(0, len(bits), 8):
-        byte = 0
-        for b in bits[i:i+8]:
-            byte = (byte << 1) | b
-        out.append(byte)
-    return bytes(out)
+    pos = np.asarray(positions, dtype=np.int64)
+    rows, cols, chans = np.unravel_index(pos, npimg.shape)
+    bits = npimg[rows, cols, chans] & _LSB_MASK
+    return np.packbits(bits).tobytes()
 
 
 # Placeholder: JPEG DCT-based embedding
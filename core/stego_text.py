@@ -12,6 +12,8 @@ Security notes:
  - Use in closed-channels or as part of multi-layer (e.g., encrypted + integrity-checked)
 """
 
+import numpy as np
+
 ZW_CHARS = {
     'ZWSP': '\u200B',  # zero width space
     'ZWNJ': '\u200C',
@@ -24,37 +26,22 @@ def embed_zero_width(input_text: str, payload: bytes) -> str:
     Encode payload as bits and insert zero-width chars between words.
     Very low visibility, but fragile to strip/normalization.
     """
-    bits = ''.join(f"{b:08b}" for b in payload)
+    bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
+    zw = np.where(bits == 1, ZW_CHARS['ZWSP'], '')
     words = input_text.split(' ')
-    out_words = []
-    bit_iter = iter(bits)
-    for w in words:
-        try:
-            b = next(bit_iter)
-            zw = ZW_CHARS['ZWSP'] if b == '1' else ''
-            out_words.append(w + zw)
-        except StopIteration:
-            out_words.append(w)
-    # append remaining bits as trailing zero-widths
-    remaining = ''.join(bit_iter)
+    n = min(len(words), len(zw))
+    out_words = [w + z for w, z in zip(words[:n], zw[:n])]
+    out_words.extend(words[n:])
     out = ' '.join(out_words)
-    if remaining:
-        out += ''.join(ZW_CHARS['ZWSP'] if c == '1' else '' for c in remaining)
+    # append remaining bits as trailing zero-widths
+    if len(zw) > n:
+        out += ''.join(zw[n:])
     return out
 
 def extract_zero_width(stego_text: str, payload_len_bytes: int) -> bytes:
-    bits = []
+    # We treat absence as 0 only when we know positions; robust parsing requires separators
     count_bits = payload_len_bytes * 8
-    for ch in stego_text:
-        if ch == ZW_CHARS['ZWSP']:
-            bits.append('1')
-        # We treat absence as 0 only when we know positions; robust parsing requires separators
-        if len(bits) >= count_bits:
-            break
-    # pad/truncate
-    bits = bits[:count_bits] + ['0'] * max(0, count_bits - len(bits))
-    out = bytearray()
-    for i in range(0, len(bits), 8):
-        byte = int(''.join(bits[i:i+8]), 2)
-        out.append(byte)
-    return bytes(out)
+    ones = min(stego_text.count(ZW_CHARS['ZWSP']), count_bits)
+    bits = np.zeros(count_bits, dtype=np.uint8)
+    bits[:ones] = 1
+    return np.packbits(bits).tobytes()
@@ -12,9 +12,27 @@ Strategy:
 import cv2
 import os
 import math
+import hashlib
+import collections
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
-import numpy as np
+from PIL import Image
 import core.stego_image as stego_image
+import core.crypto as crypto
+
+
+def _frame_subkey(stego_key: bytes, fidx: int) -> bytes:
+    """Per-frame embedding subkey; deterministic given key and frame index."""
+    return hashlib.shake_128(stego_key + fidx.to_bytes(4, 'big')).digest(32)
+
+
+def _write_pending(writer, entry):
+    kind, item = entry
+    if kind == 'plain':
+        writer.write(item)
+    else:
+        writer.write(cv2.cvtColor(item.result(), cv2.COLOR_RGB2BGR))
+
 
 def embed_in_video(input_mp4: str, payload: bytes, stego_key: bytes, output_mp4: str, frames_to_use_ratio: float = 0.5):
     cap = cv2.VideoCapture(input_mp4)
@@ -25,51 +43,43 @@ def embed_in_video(input_mp4: str, payload: bytes, stego_key: bytes, output_mp4:
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = cap.get(cv2.CAP_PROP_FPS)
 
-    # Decide which frames to use
-    import hashlib
-    total_capacity = 0
-    frames_idx = []
-    # Build deterministic PRNG for frame indices
-    counter = 0
-    while len(frames_idx) < max(1, int(frame_count * frames_to_use_ratio)):
-        digest = hashlib.sha256(stego_key + counter.to_bytes(8, 'big')).digest()
-        for j in range(0, len(digest), 2):
-            if len(frames_idx) >= int(frame_count * frames_to_use_ratio):
-                break
-            idx = int.from_bytes(digest[j:j+2], 'big') % frame_count
-            if idx not in frames_idx:
-                frames_idx.append(idx)
-        counter += 1
-    frames_idx.sort()
+    # Decide which frames to use: deterministic keyed selection via XOF stream
+    n_use = max(1, int(frame_count * frames_to_use_ratio))
+    frames_idx = sorted(crypto.keyed_index_stream(stego_key, n_use, frame_count).tolist())
 
     # Read frames, embed progressively
     writer = cv2.VideoWriter(output_mp4, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
     payload_ptr = 0
     payload_len = len(payload)
-    for fidx in range(frame_count):
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if fidx in frames_idx and payload_ptr < payload_len:
-            # Determine how many bytes we can embed in this frame
-            # Use stego_image.calculate_capacity to estimate bits
-            pil_img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            cap_bits = stego_image.calculate_capacity(pil_img)
-            cap_bytes = cap_bits // 8
-            chunk = payload[payload_ptr:payload_ptr+cap_bytes]
-            # Use a temp file approach: embed and reconvert
-            tmp_in = f"frame_{fidx}_in.png"
-            tmp_out = f"frame_{fidx}_out.png"
-            pil_img.save(tmp_in, format='PNG')
-            stego_image.embed_lsb_adaptive(tmp_in, chunk, stego_key, tmp_out)
-            new_frame = cv2.cvtColor(np.array(Image.open(tmp_out).convert('RGB')), cv2.COLOR_RGB2BGR)
-            # cleanup
-            os.remove(tmp_in)
-            os.remove(tmp_out)
-            writer.write(new_frame)
-            payload_ptr += len(chunk)
-        else:
-            writer.write(frame)
+    frames_set = set(frames_idx)
+    # Frames share dimensions, so the capacity estimate (from the first
+    # embedded frame) is computed once. Embedding of independent frames is
+    # fanned out to worker processes under per-frame subkeys; a bounded
+    # in-order deque keeps writer output in frame order and caps memory.
+    cap_bytes = None
+    max_workers = os.cpu_count() or 1
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for fidx in range(frame_count):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if fidx in frames_set and payload_ptr < payload_len:
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                if cap_bytes is None:
+                    cap_bits = stego_image.calculate_capacity(Image.fromarray(rgb))
+                    cap_bytes = cap_bits // 8
+                chunk = payload[payload_ptr:payload_ptr+cap_bytes]
+                # Embed directly on the in-memory frame; no PNG round-trip
+                pending.append(('embed', pool.submit(
+                    stego_image._embed_ndarray, rgb, chunk, _frame_subkey(stego_key, fidx))))
+                payload_ptr += len(chunk)
+            else:
+                pending.append(('plain', frame))
+            while pending and (len(pending) > 2 * max_workers or pending[0][0] == 'plain'):
+                _write_pending(writer, pending.popleft())
+        while pending:
+            _write_pending(writer, pending.popleft())
     cap.release()
     writer.release()
     if payload_ptr < payload_len:
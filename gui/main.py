@@ -13,6 +13,9 @@ Note: This is a minimal, secure-by-design skeleton. In production:
 """
 
 import sys
+import os
+import mmap
+from hashlib import sha256
 from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtWidgets import QFileDialog, QMessageBox, QInputDialog
 import core.crypto as crypto
@@ -20,6 +23,9 @@ import core.header as header_mod
 import core.stego_image as stego_image
 from utils.secure_logger import SecureLogger
 
+# payloads at or above this size are mmap'd and encrypted in chunks
+LARGE_PAYLOAD_THRESHOLD = 64 * (1 << 20)
+
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self):
         super().__init__()
@@ -39,6 +45,11 @@ class MainWindow(QtWidgets.QMainWindow):
         layout.addWidget(self.extract_btn)
 
         self.log = SecureLogger(b"admin-passphrase")  # demo; DO NOT hardcode in prod
+        backend = crypto.backend_info()
+        self.log.append({"action": "crypto-backend", **backend})
+        if not backend["hardware_aes_likely"]:
+            QMessageBox.warning(self, "Performance",
+                                "CPU reports no AES hardware support; encryption will run in software.")
 
     def embed_flow(self):
         carrier, _ = QFileDialog.getOpenFileName(self, "Select Carrier Image", "", "Images (*.png *.bmp)")
@@ -54,22 +65,31 @@ class MainWindow(QtWidgets.QMainWindow):
         if not ok or not passphrase:
             QMessageBox.warning(self, "Cancelled", "Operation cancelled: passphrase required")
             return
-        # read payload
-        with open(payload_file, "rb") as f:
-            payload = f.read()
+        # derive key: interactive profile keeps the prompt responsive, and the
+        # chosen params go into the header so extraction re-derives the same key
+        kdf_params = crypto.ARGON2_PROFILES["interactive"]
+        key, salt = crypto.derive_key(passphrase.encode('utf-8'), profile="interactive")
+        # encrypt payload; mmap large files so the plaintext streams from
+        # disk in chunks instead of being read fully into RAM first
         # compress optional - omitted for brevity
-
-        # derive key
-        key, salt = crypto.derive_key(passphrase.encode('utf-8'))
-        nonce, ct = crypto.aes_gcm_encrypt(key, payload, associated_data=b"NE-stego")
+        payload_len = os.path.getsize(payload_file)
+        with open(payload_file, "rb") as f:
+            if payload_len >= LARGE_PAYLOAD_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as payload_map:
+                    nonce, ct = crypto.aes_gcm_encrypt_stream(key, payload_map, associated_data=b"NE-stego")
+            else:
+                nonce, ct = crypto.aes_gcm_encrypt(key, f.read(), associated_data=b"NE-stego")
         # assemble header
-        hdr = header_mod.build_header(salt, {"time": header_mod.VERSION}, nonce, None, len(ct))
+        hdr = header_mod.build_header(salt, {"time": kdf_params["time_cost"],
+                                             "memory": kdf_params["memory_cost"],
+                                             "parallelism": kdf_params["parallelism"]},
+                                      nonce, None, len(ct))
         # build combined blob to embed: hdr + ct
         combined = hdr + ct
         try:
             res = stego_image.embed_lsb_adaptive(carrier, combined, stego_key=sha256(passphrase.encode('utf-8')).digest(), output_path=out_file)
             QMessageBox.information(self, "Success", f"Embedded payload to {out_file}")
-            self.log.append({"action": "embed", "carrier": carrier, "output": out_file, "payload_len": len(payload)})
+            self.log.append({"action": "embed", "carrier": carrier, "output": out_file, "payload_len": payload_len})
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
             self.log.append({"action": "embed-failed", "carrier": carrier, "error": str(e)})
@@ -82,10 +102,11 @@ class MainWindow(QtWidgets.QMainWindow):
         if not ok or not passphrase:
             QMessageBox.warning(self, "Cancelled", "Operation cancelled: passphrase required")
             return
+        stego_key = sha256(passphrase.encode('utf-8')).digest()
         try:
-            # First extract header length heuristic: we must know how many bytes to extract.
-            # For demo: extract first 1024 bytes to parse header
-            header_bytes = stego_image.extract_lsb_adaptive(stego_file, stego_key=crypto.sha256(passphrase.encode('utf-8')).digest(), payload_len_bytes=1024)
+            # Header layout is fixed-size, so extract exactly that many bytes
+            # (demo GUI never uses RSA-wrapped keys, so no trailing wrapped_key)
+            header_bytes = stego_image.extract_lsb_adaptive(stego_file, stego_key=stego_key, payload_len_bytes=header_mod.HEADER_LEN)
         except Exception:
             # Fallback: attempt using different strategy; omitted
             QMessageBox.critical(self, "Error", "Failed to read header with provided passphrase/key")
@@ -99,10 +120,13 @@ class MainWindow(QtWidgets.QMainWindow):
         # Now extract full payload length provided in header
         total_cipher_len = hdr_obj['payload_len']
         try:
-            combined = stego_image.extract_lsb_adaptive(stego_file, stego_key=crypto.sha256(passphrase.encode('utf-8')).digest(), payload_len_bytes=hdr_total_len + total_cipher_len)
+            combined = stego_image.extract_lsb_adaptive(stego_file, stego_key=stego_key, payload_len_bytes=hdr_total_len + total_cipher_len)
             # split header and ct
             ct = combined[hdr_total_len:]
-            key, _ = crypto.derive_key(passphrase.encode('utf-8'), salt=hdr_obj['salt'])
+            key = crypto.derive_key_cached(passphrase.encode('utf-8'), hdr_obj['salt'],
+                                           time_cost=hdr_obj['argon2']['time'],
+                                           memory_cost=hdr_obj['argon2']['memory'],
+                                           parallelism=hdr_obj['argon2']['parallelism'])
             plaintext = crypto.aes_gcm_decrypt(key, hdr_obj['nonce'], ct, associated_data=b"NE-stego")
             # offer to save
             out_path, _ = QFileDialog.getSaveFileName(self, "Save Extracted Payload")
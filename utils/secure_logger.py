@@ -22,17 +22,44 @@ class SecureLogger:
         self.key, self.salt = derive_key(admin_password)
         self.log_id = log_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
         self.log_path = os.path.join(LOG_DIR, f"log_{self.log_id}.bin")
+        # Persistent buffered handle: append-per-event no longer pays an
+        # open/close plus kernel write for every log line
+        self._fh = open(self.log_path, "ab", buffering=1 << 16)
+
+    def _write_record(self, plaintext: bytes):
+        nonce, ct = aes_gcm_encrypt(self.key, plaintext)
+        # store: nonce len (1) | nonce | ct len (4) | ct
+        self._fh.write(len(nonce).to_bytes(1, 'big') + nonce + len(ct).to_bytes(4, 'big') + ct)
 
     def append(self, event: dict):
         event['timestamp'] = datetime.utcnow().isoformat() + 'Z'
-        plaintext = json.dumps(event, separators=(',', ':')).encode('utf-8')
-        nonce, ct = aes_gcm_encrypt(self.key, plaintext)
-        with open(self.log_path, "ab") as f:
-            # store: nonce len (1) | nonce | ct len (4) | ct
-            f.write(len(nonce).to_bytes(1, 'big') + nonce + len(ct).to_bytes(4, 'big') + ct)
+        self._write_record(json.dumps(event, separators=(',', ':')).encode('utf-8'))
+
+    def append_batch(self, events):
+        """
+        Encrypt a batch of events under a single nonce (one JSON line per
+        event inside the record) so the per-record AES-GCM setup cost is
+        amortized across the whole batch.
+        """
+        if not events:
+            return
+        ts = datetime.utcnow().isoformat() + 'Z'
+        for event in events:
+            event['timestamp'] = ts
+        plaintext = b'\n'.join(
+            json.dumps(event, separators=(',', ':')).encode('utf-8') for event in events
+        )
+        self._write_record(plaintext)
+
+    def flush(self):
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
 
     def read_all(self, admin_password: bytes):
         key, _ = derive_key(admin_password, salt=self.salt)
+        self.flush()
         entries = []
         with open(self.log_path, "rb") as f:
             data = f.read()
@@ -43,5 +70,7 @@ class SecureLogger:
             ctlen = int.from_bytes(data[i:i+4], 'big'); i += 4
             ct = data[i:i+ctlen]; i += ctlen
             pt = aes_gcm_decrypt(key, nonce, ct)
-            entries.append(json.loads(pt.decode('utf-8')))
+            # a record holds one JSON event, or one per line for batches
+            for line in pt.splitlines():
+                entries.append(json.loads(line.decode('utf-8')))
         return entries